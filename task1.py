@@ -1,9 +1,35 @@
+import bisect
+import calendar
+import re
+import sys
 from collections import UserDict
-from datetime import datetime, date, timedelta
+from datetime import date, timedelta
+
+
+# Номер телефону: рівно 10 ASCII-цифр ([0-9], а не \d, щоб не пропускати інші цифри Unicode)
+_PHONE_RE = re.compile(r"[0-9]{10}")
+
+# Зсув дня народження за днем тижня (0 = понеділок): субота -> +2, неділя -> +1
+_WEEKEND_SHIFT = (0, 0, 0, 0, 0, 2, 1)
+
+
+def _birthday_key(value):
+    """Ключ індексу днів народження: місяць і день у календарному порядку"""
+    return value.month * 32 + value.day
+
+
+def _birthday_ordinal(value, year):
+    """Порядковий номер дня народження у вказаному році; 29.02 у невисокосний рік святкується 28.02"""
+    day = value.day
+    if value.month == 2 and day == 29 and not calendar.isleap(year):
+        day = 28
+    return date(year, value.month, day).toordinal()
 
 
 class Field:
     """Базовий клас для полів контакту"""
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -13,110 +39,276 @@ class Field:
 
 class Name(Field):
     """Клас для імені контакту"""
-    pass
+    __slots__ = ()
+
+    def __init__(self, value):
+        super().__init__(sys.intern(value))
 
 
 class Phone(Field):
     """Клас для номера телефону з перевіркою формату (10 цифр)"""
+    __slots__ = ()
+
     def __init__(self, value):
-        if not value.isdigit() or len(value) != 10:
+        if not _PHONE_RE.fullmatch(value):
             raise ValueError("Номер телефону повинен містити рівно 10 цифр.")
         super().__init__(value)
 
 
 class Birthday(Field):
     """Клас для дня народження у форматі DD.MM.YYYY"""
+    __slots__ = ()
+
     def __init__(self, value):
+        digits = value[0:2] + value[3:5] + value[6:10]
+        if (len(value) != 10 or value[2] != "." or value[5] != "."
+                or not (digits.isascii() and digits.isdigit())):
+            raise ValueError("Невірний формат дати. Використовуйте DD.MM.YYYY")
         try:
-            datetime.strptime(value, "%d.%m.%Y")
+            self.value = date(int(value[6:10]), int(value[3:5]), int(value[0:2]))
         except ValueError:
             raise ValueError("Невірний формат дати. Використовуйте DD.MM.YYYY")
-        self.value = value
 
+    def __str__(self):
+        value = self.value
+        return f"{value.day:02d}.{value.month:02d}.{value.year:04d}"
 
 
 class Record:
-    """Клас для одного контакту: ім'я + телефони + день народження"""
+    """Клас для одного контакту: ім'я + телефони + день народження.
+
+    Запис може належати лише одній книзі (атрибут book): через нього книга дізнається
+    про зміни номерів і дня народження.
+    """
+    __slots__ = ("name", "phones", "birthday", "book", "_bday_year", "_bday_ord", "_bday_next_ord",
+                 "_phones_str")
+
     def __init__(self, name):
         self.name = Name(name)
-        self.phones = []
+        self.phones = {}
         self.birthday = None
+        self.book = None
+        self._bday_year = None
+        self._bday_ord = None
+        self._bday_next_ord = None
+        self._phones_str = None
 
     def add_phone(self, phone):
-        if any(p.value == phone for p in self.phones):
+        if phone in self.phones:
             raise ValueError(f"Номер {phone} вже існує у контакті {self.name.value}.")
-        self.phones.append(Phone(phone))
+        self.phones[phone] = Phone(phone)
+        self._phones_changed()
 
     def remove_phone(self, phone):
-        phone_obj = self.find_phone(phone)
-        if phone_obj:
-            self.phones.remove(phone_obj)
+        if self.phones.pop(phone, None) is not None:
+            self._phones_changed()
 
     def edit_phone(self, old_phone, new_phone):
-        phone_obj = self.find_phone(old_phone)
-        if not phone_obj:
+        if old_phone not in self.phones:
             raise ValueError(f"Старий номер {old_phone} не знайдено.")
+        if new_phone != old_phone and new_phone in self.phones:
+            raise ValueError(f"Номер {new_phone} вже існує у контакті {self.name.value}.")
         new_phone_obj = Phone(new_phone)
-        self.phones.remove(phone_obj)
-        self.phones.append(new_phone_obj)
+        del self.phones[old_phone]
+        self.phones[new_phone] = new_phone_obj
+        self._phones_changed()
 
     def find_phone(self, phone):
-        for p in self.phones:
-            if p.value == phone:
-                return p
-        return None
+        return self.phones.get(phone)
+
+    def _phones_changed(self):
+        self._phones_str = None
+        if self.book is not None:
+            self.book._str_cache = None
+
+    def phones_str(self):
+        """Номери через кому (кешується до зміни списку номерів)"""
+        if self._phones_str is None:
+            self._phones_str = ", ".join(self.phones)
+        return self._phones_str
 
     def add_birthday(self, birthday_str):
-        self.birthday = Birthday(birthday_str)
+        birthday = Birthday(birthday_str)
+        if self.book is not None:
+            self.book._unindex_birthday(self)
+        self.birthday = birthday
+        self._bday_year = None
+        if self.book is not None:
+            self.book._index_birthday(self)
+            self.book._str_cache = None
+
+    def next_birthday_ordinal(self, year, today_ord):
+        """Порядковий номер найближчого дня народження, не раніше today_ord (кешується до зміни року)"""
+        if self._bday_year != year:
+            self._bday_ord = _birthday_ordinal(self.birthday.value, year)
+            self._bday_next_ord = None
+            self._bday_year = year
+        if self._bday_ord >= today_ord:
+            return self._bday_ord
+        if self._bday_next_ord is None:
+            self._bday_next_ord = _birthday_ordinal(self.birthday.value, year + 1)
+        return self._bday_next_ord
+
+    def copy(self):
+        """Копія контакту, ще не прив'язана до жодної книги"""
+        record = Record(self.name.value)
+        record.phones = dict(self.phones)
+        record.birthday = self.birthday
+        return record
 
     def __str__(self):
-        phones_list = ", ".join(p.value for p in self.phones) if self.phones else "немає номерів"
-        bday_str = self.birthday.value if self.birthday else "немає"
+        phones_list = self.phones_str() if self.phones else "немає номерів"
+        bday_str = str(self.birthday) if self.birthday else "немає"
         return f"{self.name.value}: {phones_list}, день народження: {bday_str}"
 
 
+def _copy_records(records):
+    """Копії записів зі словника ім'я -> Record, ще не прив'язані до жодної книги"""
+    return {name: record.copy() for name, record in records.items()}
+
+
 class AddressBook(UserDict):
     """Клас для зберігання всіх контактів"""
 
+    def __init__(self, *args, **kwargs):
+        # Паралельні списки: відсортовані ключі днів народження та відповідні імена
+        self._bday_keys = []
+        self._bday_names = []
+        # Кеш для __str__; скидається при будь-якій зміні книги або її записів
+        self._str_cache = None
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, name, record):
+        # Усі вставки (add_record, update, setdefault, конструктор) проходять тут і оновлюють індекс
+        if name != record.name.value:
+            raise ValueError(f"Ключ {name} не збігається з ім'ям контакту {record.name.value}.")
+        if record.book is not None and record.book is not self:
+            raise ValueError(f"Контакт {name} вже належить іншій адресній книзі.")
+        old = self.data.get(name)
+        if old is not None:
+            self._detach(old)
+        self.data[name] = record
+        record.book = self
+        self._index_birthday(record)
+        self._str_cache = None
+
+    def __delitem__(self, name):
+        # pop, popitem і clear з MutableMapping теж видаляють через цей метод
+        self._detach(self.data.pop(name))
+
+    def __ior__(self, other):
+        # UserDict.__ior__ змінює self.data напряму, оминаючи __setitem__ та індекс
+        self.update(other)
+        return self
+
+    def _detach(self, record):
+        self._unindex_birthday(record)
+        record.book = None
+        self._str_cache = None
+
+    def copy(self):
+        # Записи копіюються, бо кожен може належати лише одній книзі
+        return self.__class__(_copy_records(self.data))
+
+    __copy__ = copy
+
+    def __or__(self, other):
+        if not isinstance(other, (UserDict, dict)):
+            return NotImplemented
+        result = self.copy()
+        result.update(_copy_records(other))
+        return result
+
+    def __ror__(self, other):
+        if not isinstance(other, (UserDict, dict)):
+            return NotImplemented
+        result = self.__class__(_copy_records(other))
+        result.update(_copy_records(self.data))
+        return result
+
+    @classmethod
+    def fromkeys(cls, iterable, value=None):
+        # Один запис не може належати кільком іменам, тож fromkeys не має сенсу для книги
+        raise TypeError("AddressBook не підтримує fromkeys: додавайте контакти через add_record.")
+
     def add_record(self, record: Record):
-        self.data[record.name.value] = record
+        self[record.name.value] = record
 
     def find(self, name):
         return self.data.get(name)
 
     def delete(self, name):
-        if name in self.data:
-            del self.data[name]
-
-    def get_upcoming_birthdays(self, days=7):
+        record = self.data.pop(name, None)
+        if record is not None:
+            self._detach(record)
+        return record
+
+    def _index_birthday(self, record):
+        if record.birthday:
+            key = _birthday_key(record.birthday.value)
+            i = bisect.bisect_right(self._bday_keys, key)
+            self._bday_keys.insert(i, key)
+            self._bday_names.insert(i, record.name.value)
+
+    def _unindex_birthday(self, record):
+        if record.birthday:
+            key = _birthday_key(record.birthday.value)
+            name = record.name.value
+            i = bisect.bisect_left(self._bday_keys, key)
+            hi = bisect.bisect_right(self._bday_keys, key, i)
+            for j in range(i, hi):
+                if self._bday_names[j] == name:
+                    del self._bday_keys[j]
+                    del self._bday_names[j]
+                    break
+
+    def _birthday_candidates(self, today, days):
+        """Імена з індексу, чиї дні народження (без року) потрапляють у вікно дат"""
+        names = self._bday_names
+        if days >= 365:
+            return names[:]
+        end = today + timedelta(days=days)
+        lo = bisect.bisect_left(self._bday_keys, _birthday_key(today))
+        end_key = _birthday_key(end)
+        if end.month == 2 and end.day == 28 and not calendar.isleap(end.year):
+            # 29.02 у невисокосний рік святкується 28.02, тож вікно має захопити і його
+            end_key += 1
+        hi = bisect.bisect_right(self._bday_keys, end_key)
+        if end.year == today.year:
+            return names[lo:hi]
+        return names[lo:] + names[:hi]
+
+    def get_upcoming_birthdays(self, days=7, today=None):
         upcoming = []
-        today = date.today()
-
-        for record in self.data.values():
-            if record.birthday:
-                bday_date = datetime.strptime(record.birthday.value, "%d.%m.%Y").date()
-                bday_this_year = bday_date.replace(year=today.year)
-
-                if bday_this_year < today:
-                    bday_this_year = bday_this_year.replace(year=today.year + 1)
-
-                if bday_this_year.weekday() == 5:
-                    bday_this_year += timedelta(days=2)
-                elif bday_this_year.weekday() == 6:
-                    bday_this_year += timedelta(days=1)
-
-                if 0 <= (bday_this_year - today).days <= days:
-                    upcoming.append({
-                        "name": record.name.value,
-                        "birthday": bday_this_year.strftime("%d.%m.%Y")
-                    })
+        if today is None:
+            today = date.today()
+        year = today.year
+        today_ord = today.toordinal()
+        # Локальні посилання замість пошуку атрибутів і глобальних імен у циклі
+        append = upcoming.append
+        fromordinal = date.fromordinal
+        weekend_shift = _WEEKEND_SHIFT
+
+        for name in self._birthday_candidates(today, days):
+            bday_ord = self.data[name].next_birthday_ordinal(year, today_ord)
+
+            # date.weekday() для порядкового номера дорівнює (ordinal + 6) % 7
+            bday_ord += weekend_shift[(bday_ord + 6) % 7]
+
+            if bday_ord - today_ord <= days:
+                append({
+                    "name": name,
+                    "birthday": fromordinal(bday_ord).strftime("%d.%m.%Y")
+                })
 
         return upcoming
 
     def __str__(self):
         if not self.data:
             return "Список контактів порожній."
-        return "\n".join(str(record) for record in self.data.values())
+        if self._str_cache is None:
+            self._str_cache = "\n".join(str(record) for record in self.data.values())
+        return self._str_cache
 
 
 def input_error(func):
@@ -160,18 +352,16 @@ def show_phone(args, book: AddressBook):
     name = args[0]
     record = book.find(name)
     if record:
-        return ", ".join(p.value for p in record.phones)
+        return record.phones_str()
     else:
         raise KeyError
 
 @input_error
 def delete_contact(args, book: AddressBook):
     name = args[0]
-    if book.find(name):
-        book.delete(name)
-        return f"Контакт {name} видалено."
-    else:
+    if book.delete(name) is None:
         raise KeyError
+    return f"Контакт {name} видалено."
 
 @input_error
 def add_birthday(args, book: AddressBook):
@@ -191,7 +381,7 @@ def show_birthday(args, book: AddressBook):
         raise KeyError
     if not record.birthday:
         raise ValueError("День народження не встановлено.")
-    return record.birthday.value
+    return str(record.birthday)
 
 @input_error
 def birthdays(args, book: AddressBook):
@@ -200,9 +390,25 @@ def birthdays(args, book: AddressBook):
         return "Найближчих днів народження немає."
     return "\n".join(f"{item['name']} — {item['birthday']}" for item in upcoming)
 
-def show_all(book: AddressBook):
+def show_all(args, book: AddressBook):
     return str(book)
 
+def hello(args, book: AddressBook):
+    return "Привіт! Чим можу допомогти? 🖐️"
+
+
+COMMANDS = {
+    "hello": hello,
+    "add": add_contact,
+    "change": change_contact,
+    "phone": show_phone,
+    "delete": delete_contact,
+    "all": show_all,
+    "add-birthday": add_birthday,
+    "show-birthday": show_birthday,
+    "birthdays": birthdays,
+}
+
 
 def parse_input(user_input):
     command, *args = user_input.split()
@@ -210,39 +416,36 @@ def parse_input(user_input):
 
 def main():
     book = AddressBook()
-    print("Ласкаво просимо до вашого асистента! 😊")
+    write = sys.stdout.write
+    # Якщо ввід не з терміналу (наприклад, команди з файлу), працюємо без привітання та підказок
+    interactive = sys.stdin.isatty()
+    prompt = "Введіть команду: " if interactive else ""
+    if interactive:
+        write("Ласкаво просимо до вашого асистента! 😊\n")
 
     while True:
-        user_input = input("Введіть команду: ")
+        try:
+            user_input = input(prompt)
+        except EOFError:
+            break
         if not user_input.strip():
-            print("Будь ласка, введіть команду.")
+            write("Будь ласка, введіть команду.\n")
             continue
 
         command, args = parse_input(user_input)
 
         if command in ["close", "exit"]:
-            print("До побачення! 👋")
+            write("До побачення! 👋\n")
             break
-        elif command == "hello":
-            print("Привіт! Чим можу допомогти? 🖐️")
-        elif command == "add":
-            print(add_contact(args, book))
-        elif command == "change":
-            print(change_contact(args, book))
-        elif command == "phone":
-            print(show_phone(args, book))
-        elif command == "delete":
-            print(delete_contact(args, book))
-        elif command == "all":
-            print(show_all(book))
-        elif command == "add-birthday":
-            print(add_birthday(args, book))
-        elif command == "show-birthday":
-            print(show_birthday(args, book))
-        elif command == "birthdays":
-            print(birthdays(args, book))
+
+        handler = COMMANDS.get(command)
+        if handler:
+            write(handler(args, book))
+            write("\n")
         else:
-            print("Невідома команда. Спробуйте: add, change, phone, delete, all, add-birthday, show-birthday, birthdays, hello, exit.")
+            write("Невідома команда. Спробуйте: add, change, phone, delete, all, add-birthday, show-birthday, birthdays, hello, exit.\n")
+
+    sys.stdout.flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file